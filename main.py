@@ -1,5 +1,8 @@
 import asyncio
 import logging
+import signal
+
+import httpx
 
 from src.cleaner import cleanup_registry
 from src.config import Args, Config, load_config
@@ -14,31 +17,53 @@ from src.utils import (
 
 
 async def perform_cleanup(config: Config) -> None:
+    limiter = asyncio.Semaphore(config.max_concurrent_requests)
     tasks: list[asyncio.Task[CleanupResult]] = []
-    for job in config.jobs:
-        ready, next_cleanup_in = is_job_ready(job, config)
-        if not ready:
-            skip = f"Skipping job '{job.name}', next cleanup in {next_cleanup_in}"
-            await write_history(skip, config)
-            logging.warning(skip)
-            continue
-        started = f"Started job '{job.name}'"
-        await write_history(started, config)
-        logging.info(started)
-        tasks.append(asyncio.create_task(cleanup_registry(job, config)))
+    async with httpx.AsyncClient(
+        base_url=config.registry_url,
+        headers=config.headers,
+        timeout=config.timeout,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=config.max_concurrent_requests,
+            max_keepalive_connections=config.max_concurrent_requests,
+        ),
+        proxies=config.proxy,
+        trust_env=False,
+    ) as session:
+        for job in config.jobs:
+            ready, next_cleanup_in = is_job_ready(job, config)
+            if not ready:
+                skip = f"Skipping job '{job.name}', next cleanup in {next_cleanup_in}"
+                await write_history(skip, config)
+                logging.warning(skip)
+                continue
+            started = f"Started job '{job.name}'"
+            await write_history(started, config)
+            logging.info(started)
+            tasks.append(
+                asyncio.create_task(cleanup_registry(session, job, limiter, config))
+            )
 
-    for completed_task in asyncio.as_completed(tasks):
-        res = await completed_task
-        await update_latest_cleanup(res, config)
-        finish = f"Finished '{res.job_name}' with {len(res.errors)} errors"
-        await write_history(finish, config)
-        logging.info(finish)
+        for completed_task in asyncio.as_completed(tasks):
+            res = await completed_task
+            await update_latest_cleanup(res, config)
+            finish = f"Finished '{res.job_name}' with {len(res.errors)} errors"
+            await write_history(finish, config)
+            logging.info(finish)
 
 
-async def main(config) -> None:
-    while True:
+async def main(config: Config) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    while not stop.is_set():
         await perform_cleanup(config)
-        await asyncio.sleep(60 * 15)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=60 * 15)
+        except TimeoutError:
+            continue
 
 
 if __name__ == "__main__":
@@ -48,15 +73,11 @@ if __name__ == "__main__":
     check_job_names(config)
     if config.args.debug:
         logging.warning("Running in debug mode, found tags will not be deleted")
-    loop = asyncio.get_event_loop()
     try:
         if not config.args.watch:
             logging.warning("Running in manual mode; One-time cleanup")
-            loop.run_until_complete(perform_cleanup(config))
+            asyncio.run(perform_cleanup(config))
         else:
-            asyncio.ensure_future(main(config))
-            loop.run_forever()
+            asyncio.run(main(config))
     except KeyboardInterrupt:
         pass
-    finally:
-        loop.close()
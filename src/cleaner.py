@@ -1,13 +1,14 @@
 import asyncio
 import logging
+from collections import defaultdict
+from datetime import datetime
 
-import dateutil.parser
 import httpx
+import orjson
 
 from src.config import Config, Job
 from src.models import CleanupResult, Tag, WorkMode
 from src.utils import (
-    build_headers,
     exclude_tags,
     filtered_tags,
     make_repo_stats,
@@ -20,9 +21,9 @@ async def list_repositories(
     session: httpx.AsyncClient, config: Config
 ) -> tuple[list[str], str | None]:
     try:
-        response = await session.get(f"{config.registry_url}/_catalog")
+        response = await session.get("/_catalog")
         response.raise_for_status()
-        return response.json()["repositories"], None
+        return orjson.loads(response.content)["repositories"], None
     except httpx.HTTPStatusError as err:
         error = f"Error listing repositories. code: {err.response.status_code}, text: {err.response.text}"
         logging.critical(error)
@@ -34,14 +35,18 @@ async def list_repositories(
 
 
 async def get_tags(
-    session: httpx.AsyncClient, repository: str, config: Config
+    session: httpx.AsyncClient,
+    repository: str,
+    limiter: asyncio.Semaphore,
+    config: Config,
 ) -> tuple[list[Tag], str | None]:
     try:
-        response = await session.get(f"{config.registry_url}/{repository}/tags/list")
+        async with limiter:
+            response = await session.get(f"/{repository}/tags/list")
         response.raise_for_status()
         tags = [
             Tag(name=tag, repository=repository)
-            for tag in response.json().get("tags", [])
+            for tag in orjson.loads(response.content).get("tags", [])
         ]
         if not tags:
             logging.warning(f"No tags found for {repository}")
@@ -62,28 +67,38 @@ async def tags_for_all_repos(
     errors_total: list[str] = []
     found_tags: list[Tag] = []
 
-    async with limiter:
-        all_tasks = [
-            asyncio.create_task(get_tags(session, repository, config))
+    results = await asyncio.gather(
+        *(
+            get_tags(session, repository, limiter, config)
             for repository in job.repositories
-        ]
+        )
+    )
 
-        for task in asyncio.as_completed(all_tasks):
-            tags, error = await task
-            if error:
-                errors_total.append(error)
-            if tags:
-                found_tags.extend(filtered_tags(job, tags))
+    for tags, error in results:
+        if error:
+            errors_total.append(error)
+        if tags:
+            found_tags.extend(filtered_tags(job, tags))
 
     return found_tags, errors_total
 
 
 async def update_hashes(
-    session: httpx.AsyncClient, tag: Tag, config: Config
+    session: httpx.AsyncClient, tag: Tag, limiter: asyncio.Semaphore, config: Config
 ) -> str | None:
-    response = await session.get(
-        f"{config.registry_url}/{tag.repository}/manifests/{tag.name}"
-    )
+    manifest_url = f"/{tag.repository}/manifests/{tag.name}"
+    async with limiter:
+        head_response = await session.head(manifest_url)
+    if head_response.status_code != 200:
+        error = (
+            f"Error getting digest for {tag.repository}:{tag.name}. "
+            f"code: {head_response.status_code}. text: {head_response.text}"
+        )
+        logging.error(error)
+        return error
+    deletion_hash = head_response.headers.get("Docker-Content-Digest", None)
+    async with limiter:
+        response = await session.get(manifest_url)
     if response.status_code != 200:
         error = (
             f"Error getting digest for {tag.repository}:{tag.name}. "
@@ -91,12 +106,14 @@ async def update_hashes(
         )
         logging.error(error)
         return error
-    deletion_hash = response.headers.get("Docker-Content-Digest", None)
-    config_hash = (response.json()).get("config", {}).get("digest", None)
+    body = orjson.loads(response.content)
+    if not deletion_hash:
+        deletion_hash = response.headers.get("Docker-Content-Digest", None)
+    config_hash = body.get("config", {}).get("digest", None)
     if not deletion_hash or not config_hash:
         error = (
             f"Error getting digests for {tag.repository}:{tag.name}. "
-            f"Invalid response: {response.json()}"
+            f"Invalid response: {body}"
         )
         logging.error(error)
         return error
@@ -106,31 +123,11 @@ async def update_hashes(
     return None
 
 
-async def update_all_hashes(
-    session: httpx.AsyncClient,
-    tags: list[Tag],
-    limiter: asyncio.Semaphore,
-    config: Config,
-) -> list[str]:
-    errors_total = []
-    tag_details_tasks: list[asyncio.Task[str | None]] = []
-    async with limiter:
-        for tag in tags:
-            tag_details_tasks.append(
-                asyncio.create_task(update_hashes(session, tag, config))
-            )
-        for completed_task in asyncio.as_completed(tag_details_tasks):
-            if err := await completed_task:
-                errors_total.append(err)
-    return errors_total
-
-
 async def update_timestamp(
-    session: httpx.AsyncClient, tag: Tag, config: Config
+    session: httpx.AsyncClient, tag: Tag, limiter: asyncio.Semaphore, config: Config
 ) -> str | None:
-    response = await session.get(
-        f"{config.registry_url}/{tag.repository}/blobs/{tag.config_hash}"
-    )
+    async with limiter:
+        response = await session.get(f"/{tag.repository}/blobs/{tag.config_hash}")
     if response.status_code != 200:
         error = (
             f"Error getting creation time for {tag.repository}:{tag.name}. "
@@ -138,7 +135,7 @@ async def update_timestamp(
         )
         logging.error(error)
         return error
-    data = response.json()
+    data = orjson.loads(response.content)
     created = data.get("created")
     if not created:
         error = (
@@ -147,36 +144,43 @@ async def update_timestamp(
         )
         logging.error(error)
         return error
-    tag.creation_date = dateutil.parser.parse(created)
+    try:
+        tag.creation_date = datetime.fromisoformat(created)
+    except ValueError:
+        import dateutil.parser
+
+        tag.creation_date = dateutil.parser.parse(created)
     return None
 
 
-async def update_all_timestamps(
+async def update_tag_details(
+    session: httpx.AsyncClient, tag: Tag, limiter: asyncio.Semaphore, config: Config
+) -> str | None:
+    if err := await update_hashes(session, tag, limiter, config):
+        return err
+    return await update_timestamp(session, tag, limiter, config)
+
+
+async def update_all_tag_details(
     session: httpx.AsyncClient,
     tags: list[Tag],
     limiter: asyncio.Semaphore,
     config: Config,
 ) -> list[str]:
-    errors_total = []
-    tag_details_tasks: list[asyncio.Task[str | None]] = []
-    async with limiter:
-        for tag in tags:
-            tag_details_tasks.append(
-                asyncio.create_task(update_timestamp(session, tag, config))
-            )
-        for completed_task in asyncio.as_completed(tag_details_tasks):
-            if err := await completed_task:
-                errors_total.append(err)
-    return errors_total
+    results = await asyncio.gather(
+        *(update_tag_details(session, tag, limiter, config) for tag in tags)
+    )
+    return [err for err in results if err]
 
 
 async def delete_tag(
-    session: httpx.AsyncClient, tag: Tag, config: Config
+    session: httpx.AsyncClient, tag: Tag, limiter: asyncio.Semaphore, config: Config
 ) -> str | None:
     try:
-        response = await session.delete(
-            f"{config.registry_url}/{tag.repository}/manifests/{tag.deletion_hash}",
-        )
+        async with limiter:
+            response = await session.delete(
+                f"/{tag.repository}/manifests/{tag.deletion_hash}",
+            )
         response.raise_for_status()
         return None
     except httpx.HTTPStatusError as err:
@@ -198,74 +202,50 @@ async def delete_all_tags(
     limiter: asyncio.Semaphore,
     config: Config,
 ) -> list[str]:
-    errors_total = []
-    tag_deletion_tasks: list[asyncio.Task[str | None]] = []
-    async with limiter:
-        for tag in tags:
-            tag_deletion_tasks.append(
-                asyncio.create_task(delete_tag(session, tag, config))
-            )
-        for completed_task in asyncio.as_completed(tag_deletion_tasks):
-            if err := await completed_task:
-                errors_total.append(err)
-    return errors_total
+    results = await asyncio.gather(
+        *(delete_tag(session, tag, limiter, config) for tag in tags)
+    )
+    return [err for err in results if err]
 
 
-async def cleanup_registry(job: Job, config: Config) -> CleanupResult:
+async def cleanup_registry(
+    session: httpx.AsyncClient, job: Job, limiter: asyncio.Semaphore, config: Config
+) -> CleanupResult:
     started_at = true_utcnow()
     errors_total: list[str] = []
     success = True
 
-    max_concurrent_requests = config.max_concurrent_requests
-    max_keepalive_connections = (max_concurrent_requests // 2) or 1
-
     try:
-        async with httpx.AsyncClient(
-            headers=build_headers(config),
-            timeout=config.timeout,
-            follow_redirects=True,
-            limits=httpx.Limits(
-                max_connections=max_concurrent_requests,
-                max_keepalive_connections=max_keepalive_connections,
-            ),
-            proxies=config.proxy,
-            trust_env=False,
-        ) as session:
-            limiter = asyncio.Semaphore(max_concurrent_requests)
-
-            all_available_repos, err = await list_repositories(session, config)
-            errors_total = [err] if err else []
-
-            unfold_repository_regexps(all_available_repos, job)
-
-            found_tags, errors = await tags_for_all_repos(session, job, limiter, config)
-            errors_total.extend(errors)
-
-            if not found_tags and errors_total:
-                success = False
+        all_available_repos, err = await list_repositories(session, config)
+        errors_total = [err] if err else []
 
-            errors_total.extend(
-                await update_all_hashes(session, found_tags, limiter, config)
-            )
-            errors_total.extend(
-                await update_all_timestamps(session, found_tags, limiter, config)
-            )
+        unfold_repository_regexps(all_available_repos, job)
 
-            grouped_tags_by_repo: dict[str, list[Tag]] = {}
-            for tag in found_tags:
-                grouped_tags_by_repo.setdefault(tag.repository, []).append(tag)
+        found_tags, errors = await tags_for_all_repos(session, job, limiter, config)
+        errors_total.extend(errors)
 
-            repo_stats = []
-            all_to_delete = []
-            for repository, tags in grouped_tags_by_repo.items():
-                to_delete, to_save = exclude_tags(job, tags)
-                all_to_delete.extend(to_delete)
-                repo_stats.append(make_repo_stats(repository, to_delete, to_save))
+        if not found_tags and errors_total:
+            success = False
 
-            if not config.args.debug:
-                errors_total.extend(
-                    await delete_all_tags(session, all_to_delete, limiter, config)
-                )
+        errors_total.extend(
+            await update_all_tag_details(session, found_tags, limiter, config)
+        )
+
+        grouped_tags_by_repo: defaultdict[str, list[Tag]] = defaultdict(list)
+        for tag in found_tags:
+            grouped_tags_by_repo[tag.repository].append(tag)
+
+        repo_stats = []
+        all_to_delete = []
+        for repository, tags in grouped_tags_by_repo.items():
+            to_delete, to_save = exclude_tags(job, tags)
+            all_to_delete.extend(to_delete)
+            repo_stats.append(make_repo_stats(repository, to_delete, to_save))
+
+        if not config.args.debug:
+            errors_total.extend(
+                await delete_all_tags(session, all_to_delete, limiter, config)
+            )
 
         return CleanupResult(
             job_name=job.name,
@@ -274,7 +254,7 @@ async def cleanup_registry(job: Job, config: Config) -> CleanupResult:
             finished_at=true_utcnow(),
             errors=errors_total,
             success=success,
-            found_tags=[{tag.name: tag.creation_date} for tag in found_tags],
+            found_tags={tag.name: tag.creation_date for tag in found_tags},
             found_tags_count=len(found_tags),
             repo_stats=repo_stats,
         )
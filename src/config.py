@@ -1,3 +1,5 @@
+import base64
+import json
 import logging
 import os
 import re
@@ -6,7 +8,7 @@ from pathlib import Path
 from typing import Any
 from urllib.parse import urlparse
 
-from pydantic import BaseModel, ValidationError, field_validator
+from pydantic import BaseModel, PrivateAttr, ValidationError, field_validator
 from yaml import safe_load
 
 CACHE_DIR = Path("cache")
@@ -24,6 +26,16 @@ class Job(BaseModel):
     save_last: int
     clean_every_n_hours: int
     older_than_days: int
+    _combined_regexp: re.Pattern | None = PrivateAttr(default=None)
+
+    @property
+    def combined_regexp(self) -> re.Pattern:
+        """Single alternation of all tag_regexps, compiled on first use."""
+        if self._combined_regexp is None:
+            self._combined_regexp = re.compile(
+                "|".join(f"(?:{r.pattern})" for r in self.tag_regexps)
+            )
+        return self._combined_regexp
 
     @field_validator("tag_regexps")
     @classmethod
@@ -126,6 +138,36 @@ class Config(BaseModel):
     jobs: list[Job]
     files: CacheFiles
     args: Args
+    _latest_cache: dict[str, Any] | None = PrivateAttr(default=None)
+    _headers: dict[str, str] | None = PrivateAttr(default=None)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Static request headers, built once per process."""
+        if self._headers is None:
+            basic_auth = base64.standard_b64encode(
+                f"{self.username}:{self.password}".encode()
+            ).decode()
+            self._headers = {
+                "Accept": "application/vnd.docker.distribution.manifest.v2+json",
+                "User-Agent": "Registry cleaner",
+                "Docker-Distribution-API-Version": "registry/2.0",
+                "Authorization": f"Basic {basic_auth}",
+            }
+        return self._headers
+
+    @property
+    def latest_cleanup(self) -> dict[str, Any]:
+        """In-memory view of the last cleanup reports, loaded from disk once."""
+        if self._latest_cache is None:
+            try:
+                self._latest_cache = json.loads(self.files.last_clean.read_text())
+            except (OSError, json.JSONDecodeError) as err:
+                logging.warning(
+                    f"An error occurred while parsing the latest report: {err}. Seems it was blank"
+                )
+                self._latest_cache = {}
+        return self._latest_cache
 
     @staticmethod
     def from_dict(data: dict[str, Any]) -> "Config":
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime
 
 from pydantic import BaseModel
@@ -12,9 +13,9 @@ class WorkMode(StrEnum):
 class RepositoryInfo(BaseModel):
     name: str
     tags_total_count: int
-    tags_to_delete: list[dict[str, datetime | None]]
+    tags_to_delete: dict[str, datetime | None]
     tags_to_delete_count: int
-    tags_saved: list[dict[str, datetime | None]]
+    tags_saved: dict[str, datetime | None]
     tags_saved_count: int
 
 
@@ -25,12 +26,13 @@ class CleanupResult(BaseModel):
     finished_at: datetime
     success: bool
     errors: list[str]
-    found_tags: list[dict[str, datetime | None]]
+    found_tags: dict[str, datetime | None]
     found_tags_count: int
     repo_stats: list[RepositoryInfo]
 
 
-class Tag(BaseModel):
+@dataclass(slots=True)
+class Tag:
     repository: str
     name: str
     deletion_hash: str = ""
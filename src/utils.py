@@ -1,14 +1,15 @@
 import asyncio
-import base64
-import json
+import heapq
 import logging
+import os
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 from enum import StrEnum
 from logging import LogRecord
 from pathlib import Path
 import re
 
-from pydantic import ValidationError
+import orjson
 
 from src.config import LOG_FORMAT, Config, Job
 from src.models import CleanupResult, RepositoryInfo, Tag, WorkMode
@@ -32,11 +33,15 @@ class ColoredFormatter(logging.Formatter):
             logging.ERROR: f"{Colors.RED}{self.format_}{Colors.RESET}",
             logging.CRITICAL: f"{Colors.CRED}{self.format_}{Colors.RESET}",
         }
+        self._default_formatter = logging.Formatter(self.format_)
+        self._formatters = {
+            level: logging.Formatter(colored_fmt)
+            for level, colored_fmt in self.FORMATS.items()
+        }
         super().__init__(fmt, *args, **kwargs)
 
     def format(self, record: LogRecord) -> str:
-        log_fmt = self.FORMATS.get(record.levelno, self.format_)
-        formatter = logging.Formatter(log_fmt)
+        formatter = self._formatters.get(record.levelno, self._default_formatter)
         return formatter.format(record)
 
 
@@ -57,25 +62,39 @@ def init_logger(config: Config) -> None:
     )
 
 
+_history_lock = asyncio.Lock()
+_last_clean_lock = asyncio.Lock()
+
+
+def _append_line(path: Path, line: str) -> None:
+    with open(path, "a") as f:
+        f.write(line)
+
+
 async def write_history(msg: str, config: Config) -> None:
-    async with asyncio.Lock():
-        with open(config.files.history, "a") as f:
-            f.write(f"[{datetime.now(tz=timezone.utc)}] {msg}\n")
+    line = f"[{datetime.now(tz=timezone.utc)}] {msg}\n"
+    async with _history_lock:
+        await asyncio.to_thread(_append_line, config.files.history, line)
+
+
+def _flush_latest_cleanup(path: Path, info: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(
+        orjson.dumps(
+            info,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z,
+            default=str,
+        )
+    )
+    os.replace(tmp, path)
 
 
 async def update_latest_cleanup(results: CleanupResult, config: Config) -> None:
-    info = {}
-    async with asyncio.Lock():
-        with open(config.files.last_clean, "r") as f:
-            try:
-                info = json.load(f)
-            except Exception as err:
-                logging.warning(
-                    f"An error occurred while parsing the latest report: {err}. Seems it was blank"
-                )
-        with open(config.files.last_clean, "w") as f:
-            info[results.job_name] = results.model_dump()
-            json.dump(info, f, indent=4, default=str)
+    async with _last_clean_lock:
+        config.latest_cleanup[results.job_name] = results.model_dump()
+        await asyncio.to_thread(
+            _flush_latest_cleanup, config.files.last_clean, config.latest_cleanup
+        )
 
 
 def hours_and_minutes_until_next_scan(
@@ -90,85 +109,74 @@ def hours_and_minutes_until_next_scan(
 
 
 def is_job_ready(job: Job, config: Config) -> tuple[bool, str]:
-    report: CleanupResult | None = None
-    with open(config.files.last_clean, "r") as f:
+    last_scan = config.latest_cleanup.get(job.name)
+    if not last_scan:
+        return True, ""
+    if last_scan.get("mode") == WorkMode.MANUAL:
+        return True, ""
+    finished_at = last_scan.get("finished_at")
+    if isinstance(finished_at, str):
         try:
-            if last_scans := json.load(f):
-                last_scan = last_scans.get(job.name, {})
-                if not last_scan:
-                    return True, ""
-                report = CleanupResult(**last_scan)
-                if report.mode == WorkMode.MANUAL:
-                    return True, ""
-            if not report:
-                return True, ""
-        except (json.decoder.JSONDecodeError, IndexError):
-            return True, ""
-        except ValidationError as err:
+            finished_at = datetime.fromisoformat(finished_at)
+        except ValueError as err:
             logging.error(f"An error occurred while parsing the latest report: {err}")
             return True, ""
+    if not isinstance(finished_at, datetime):
+        return True, ""
     if (
-        report.finished_at + timedelta(hours=job.clean_every_n_hours)
-    ) <= true_utcnow() or not report.success:
+        finished_at + timedelta(hours=job.clean_every_n_hours)
+    ) <= true_utcnow() or not last_scan.get("success"):
         return True, ""
     return False, hours_and_minutes_until_next_scan(
-        report.finished_at, job.clean_every_n_hours
+        finished_at, job.clean_every_n_hours
     )
 
 
-def build_headers(config: Config) -> dict[str, str]:
-    basic_auth = base64.standard_b64encode(
-        f"{config.username}:{config.password}".encode()
-    ).decode()
-    return {
-        "Accept": "application/vnd.docker.distribution.manifest.v2+json",
-        "User-Agent": "Registry cleaner",
-        "Docker-Distribution-API-Version": "registry/2.0",
-        "Authorization": f"Basic {basic_auth}",
-    }
-
-
 def true_utcnow() -> datetime:
     return datetime.now(tz=timezone.utc)
 
 
 def filtered_tags(job: Job, tags: list[Tag]) -> list[Tag]:
-    res = []
-    for tag in tags:
-        for rule in job.tag_regexps:
-            if rule.match(tag.name):
-                res.append(tag)
-                break
-    return res
+    combined = job.combined_regexp
+    return [tag for tag in tags if combined.match(tag.name)]
 
 
 def group_by_rules(job: Job, tags: list[Tag]) -> list[list[Tag]]:
-    groups = []
-    for rule in job.tag_regexps:
-        groups.append([tag for tag in tags if rule.match(tag.name)])
+    rules = list(job.tag_regexps)
+    groups: list[list[Tag]] = [[] for _ in rules]
+    for tag in tags:
+        for group, rule in zip(groups, rules):
+            if rule.match(tag.name):
+                group.append(tag)
+                break
     return groups
 
 
 def exclude_tags(job: Job, tags_all: list[Tag]) -> tuple[list[Tag], list[Tag]]:
     all_to_delete: list[Tag] = []
     all_to_save: list[Tag] = []
+    threshold = true_utcnow() - timedelta(days=job.older_than_days)
 
     for tags in group_by_rules(job, tags_all):
-        to_delete = sorted(
-            list(
-                tag
-                for tag in tags
-                if tag.deletion_hash
-                and tag.config_hash
-                and tag.creation_date
-                and (tag.creation_date + timedelta(days=job.older_than_days))
-                <= true_utcnow()
-            ),
+        eligible = [
+            tag
+            for tag in tags
+            if tag.deletion_hash
+            and tag.config_hash
+            and tag.creation_date
+            and tag.creation_date <= threshold
+        ]
+        if len(eligible) <= job.save_last:
+            all_to_save.extend(tags)
+            continue
+        to_delete = heapq.nsmallest(
+            len(eligible) - job.save_last,
+            eligible,
             key=lambda tag: tag.creation_date,  # type: ignore
-            reverse=True,
-        )[job.save_last :]
+        )
+        delete_ids = {id(tag) for tag in to_delete}
         all_to_delete.extend(to_delete)
-        all_to_save.extend([tag for tag in tags if tag not in to_delete])
+        all_to_save.extend(tag for tag in tags if id(tag) not in delete_ids)
 
     return all_to_delete, all_to_save
 
@@ -191,11 +199,10 @@ def unfold_repository_regexps(all_repositories: list[str], job: Job) -> None:
 
 
 def check_job_names(config: Config) -> None:
-    names = []
-    for job in config.jobs:
-        names.append(job.name)
-    if list(set(names)) != [job.name for job in config.jobs]:
-        logging.critical("Job names must be unique")
+    counts = Counter(job.name for job in config.jobs)
+    duplicates = [name for name, count in counts.items() if count > 1]
+    if duplicates:
+        logging.critical(f"Job names must be unique. Duplicates: {duplicates}")
         sys.exit(1)
 
 
@@ -205,8 +212,8 @@ def make_repo_stats(
     return RepositoryInfo(
         name=repository,
         tags_total_count=len(to_delete) + len(to_save),
-        tags_to_delete=[{tag.name: tag.creation_date} for tag in to_delete],
+        tags_to_delete={tag.name: tag.creation_date for tag in to_delete},
         tags_to_delete_count=len(to_delete),
-        tags_saved=[{tag.name: tag.creation_date} for tag in to_save],
+        tags_saved={tag.name: tag.creation_date for tag in to_save},
         tags_saved_count=len(to_save),
     )
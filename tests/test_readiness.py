@@ -3,26 +3,36 @@ import re
 from datetime import timedelta
 from pathlib import Path
 
+import pytest
+
 from src.config import Args, CacheFiles, Config, Job
 from src.utils import is_job_ready, true_utcnow
 
+_SEMVER_RE = re.compile(r"v\d+\.\d+\.\d+")
+_SEMVER_REGEXPS = frozenset({_SEMVER_RE})
+_REPOSITORIES = frozenset({"repo1", "repo2"})
 
-def test_is_job_ready_without_last_scans():
-    files = CacheFiles(
-        last_clean=Path("tests/files/last_clean_blank.json"),
-        history=Path("tests/files/history.log"),
-    )
-    args = Args(debug=False, watch=True, jobs=None, http_logs=False)
-    job = Job(
+
+@pytest.fixture(scope="module")
+def base_job() -> Job:
+    return Job(
         name="test_job",
-        repositories={"repo1", "repo2"},
-        tag_regexps={re.compile(r"v\d+\.\d+\.\d+")},
+        repositories=_REPOSITORIES,
+        tag_regexps=_SEMVER_REGEXPS,
         save_last=2,
         clean_every_n_hours=12,
         older_than_days=3,
     )
-    config = Config(
-        registry_url="https://example.com/v2",
+
+
+@pytest.fixture(scope="module")
+def base_args() -> Args:
+    return Args(debug=False, watch=True, jobs=None, http_logs=False)
+
+
+def _make_config(job: Job, args: Args, files: CacheFiles) -> Config:
+    return Config(
+        registry_url="https://example.com",
         username="user",
         password="pass",
         max_concurrent_requests=10,
@@ -33,108 +43,67 @@ def test_is_job_ready_without_last_scans():
         args=args,
     )
 
-    is_ready, next_scan = is_job_ready(job, config)
+
+def test_is_job_ready_without_last_scans(base_job, base_args):
+    files = CacheFiles(
+        last_clean=Path("tests/files/last_clean_blank.json"),
+        history=Path("tests/files/history.log"),
+    )
+    config = _make_config(base_job, base_args, files)
+
+    is_ready, next_scan = is_job_ready(base_job, config)
 
     assert is_ready is True
     assert next_scan == ""
 
 
-def test_is_job_ready_with_old_last_scan():
+def test_is_job_ready_with_old_last_scan(base_job, base_args):
     files = CacheFiles(
         last_clean=Path("tests/files/last_clean.json"),
         history=Path("tests/files/history.log"),
     )
-    args = Args(debug=False, watch=True, jobs=None, http_logs=False)
-    job = Job(
-        name="test_job",
-        repositories={"repo1", "repo2"},
-        tag_regexps={re.compile(r"v\d+\.\d+\.\d+")},
-        save_last=2,
-        clean_every_n_hours=12,
-        older_than_days=3,
-    )
-    config = Config(
-        registry_url="https://example.com",
-        username="user",
-        password="pass",
-        max_concurrent_requests=10,
-        proxy=None,
-        timeout=20,
-        jobs=[job],
-        files=files,
-        args=args,
-    )
+    config = _make_config(base_job, base_args, files)
 
-    is_ready, next_scan = is_job_ready(job, config)
+    is_ready, next_scan = is_job_ready(base_job, config)
 
     assert is_ready is True
     assert next_scan == ""
 
 
-def test_is_job_ready_with_recent_last_scan():
+@pytest.mark.parametrize(
+    ("mode", "expected_ready"), [("auto", False), ("manual", True)]
+)
+def test_is_job_ready_with_recent_last_scan(
+    base_job, base_args, tmp_path, mode, expected_ready
+):
     files = CacheFiles(
-        last_clean=Path("tests/files/last_clean_recent.json"),
-        history=Path("tests/files/history.log"),
-    )
-    args = Args(debug=False, watch=True, jobs=None, http_logs=False)
-    job = Job(
-        name="test_job",
-        repositories={"repo1", "repo2"},
-        tag_regexps={re.compile(r"v\d+\.\d+\.\d+")},
-        save_last=2,
-        clean_every_n_hours=35,
-        older_than_days=3,
-    )
-    config = Config(
-        registry_url="https://example.com",
-        username="user",
-        password="pass",
-        max_concurrent_requests=10,
-        proxy=None,
-        timeout=20,
-        jobs=[job],
-        files=files,
-        args=args,
+        last_clean=tmp_path / "last_clean_recent.json",
+        history=tmp_path / "history.log",
     )
+    job = base_job.model_copy(update={"clean_every_n_hours": 35})
 
+    six_hours_ago = (true_utcnow() - timedelta(hours=6)).isoformat()
     last_scans = {
         "test_job": {
             "job_name": "test_job",
-            "finished_at": str(true_utcnow() - timedelta(hours=6)),
-            "started_at": str(true_utcnow() - timedelta(hours=6)),
+            "finished_at": six_hours_ago,
+            "started_at": six_hours_ago,
             "success": True,
-            "found_tags": [],
+            "found_tags": {},
             "found_tags_count": 0,
             "repo_stats": [],
             "errors": [],
-            "mode": "auto",
+            "mode": mode,
         }
     }
-    with open(config.files.last_clean, "w") as f:
-        json.dump(last_scans, f)
-
-    is_ready, next_scan = is_job_ready(job, config)
+    files.last_clean.write_text(json.dumps(last_scans))
 
-    assert is_ready is False
-    assert next_scan != ""
-
-    last_scans = {
-        "test_job": {
-            "job_name": "test_job",
-            "finished_at": str(true_utcnow() - timedelta(hours=6)),
-            "started_at": str(true_utcnow() - timedelta(hours=6)),
-            "success": True,
-            "found_tags": [],
-            "found_tags_count": 0,
-            "repo_stats": [],
-            "errors": [],
-            "mode": "manual",
-        }
-    }
-    with open(config.files.last_clean, "w") as f:
-        json.dump(last_scans, f)
+    config = _make_config(job, base_args, files)
 
     is_ready, next_scan = is_job_ready(job, config)
 
-    assert is_ready is True
-    assert next_scan == ""
+    assert is_ready is expected_ready
+    if expected_ready:
+        assert next_scan == ""
+    else:
+        assert next_scan != ""
@@ -1,32 +1,35 @@
 import re
-from src.config import Job
-from src.utils import unfold_repository_regexps
 
+import pytest
 
-def test_unfold_repository_regexps_no_regex():
-    all_repositories = ["repo1", "repo2", "repo3"]
-    job = Job(
-        name="test",
-        description="Test job",
-        repositories={"repo1", "repo3"},
-        tag_regexps={re.compile(r"\d+")},
-        save_last=5,
-        clean_every_n_hours=24,
-        older_than_days=7,
-    )
-
-    unfold_repository_regexps(all_repositories, job)
-
-    assert job.repositories == {"repo1", "repo3"}
-
+from src.config import Job
+from src.utils import unfold_repository_regexps
 
-def test_unfold_repository_regexps_with_regex():
-    all_repositories = ["repo1", "repo2", "repo333", "repof"]
+_DIGITS_RE = re.compile(r"\d+")
+_DIGITS_REGEXPS = frozenset({_DIGITS_RE})
+
+
+@pytest.mark.parametrize(
+    ("all_repositories", "job_repositories", "expected"),
+    [
+        (
+            ["repo1", "repo2", "repo3"],
+            frozenset({"repo1", "repo3"}),
+            {"repo1", "repo3"},
+        ),
+        (
+            ["repo1", "repo2", "repo333", "repof"],
+            frozenset({"r/repo\\d+/"}),
+            {"repo1", "repo2", "repo333"},
+        ),
+    ],
+)
+def test_unfold_repository_regexps(all_repositories, job_repositories, expected):
     job = Job(
         name="test",
         description="Test job",
-        repositories={"r/repo\\d+/"},
-        tag_regexps={re.compile(r"\d+")},
+        repositories=job_repositories,
+        tag_regexps=_DIGITS_REGEXPS,
         save_last=5,
         clean_every_n_hours=24,
         older_than_days=7,
@@ -34,4 +37,4 @@ def test_unfold_repository_regexps_with_regex():
 
     unfold_repository_regexps(all_repositories, job)
 
-    assert job.repositories == {"repo1", "repo2", "repo333"}
+    assert job.repositories == expected
@@ -1,3 +1,4 @@
+import dataclasses
 import re
 from datetime import datetime, timezone
 
@@ -5,62 +6,66 @@ from src.config import Job
 from src.models import Tag
 from src.utils import exclude_tags, true_utcnow
 
+_TAG_RE = re.compile(r"tag\d")
+_TAG_REGEXPS = frozenset({_TAG_RE})
+_REPOSITORIES = frozenset({"repo1", "repo2"})
 
-def test_exclude_tags():
-    # Create some example tags
-    tag1 = Tag(
+_BASE_TAGS = (
+    Tag(
         name="tag1",
         repository="repo1",
         deletion_hash="hash1",
         config_hash="hash1",
         creation_date=datetime(1990, 8, 1, tzinfo=timezone.utc),
-    )
-    tag2 = Tag(
+    ),
+    Tag(
         name="tag2",
         repository="repo1",
         deletion_hash="hash2",
         config_hash="hash2",
         creation_date=datetime(1990, 8, 2, tzinfo=timezone.utc),
-    )
-    tag3 = Tag(
+    ),
+    Tag(
         name="tag3",
         repository="repo2",
         deletion_hash="hash3",
         config_hash="hash3",
         creation_date=datetime(1990, 8, 1, tzinfo=timezone.utc),
-    )
-    tag4 = Tag(
+    ),
+    Tag(
         name="tag4",
         repository="repo2",
         deletion_hash="hash4",
         config_hash="hash4",
         creation_date=datetime(1990, 8, 2, tzinfo=timezone.utc),
-    )
-    tag5 = Tag(
+    ),
+    Tag(
         name="tag5",
         repository="repo2",
         deletion_hash="",
         config_hash="hash5",
         creation_date=datetime(1990, 8, 3, tzinfo=timezone.utc),
-    )
+    ),
+)
+
 
-    # Create a sample Job
+def test_exclude_tags():
     job = Job(
         name="job1",
-        repositories={"repo1", "repo2"},
-        tag_regexps={re.compile(r"tag\d")},
+        repositories=_REPOSITORIES,
+        tag_regexps=_TAG_REGEXPS,
         save_last=1,
         clean_every_n_hours=24,
         older_than_days=2,
     )
 
-    tags_all = [tag1, tag2, tag3, tag4, tag5]
-    all_to_delete, all_to_save = exclude_tags(job, tags_all)
+    all_to_delete, all_to_save = exclude_tags(job, list(_BASE_TAGS))
     assert len(all_to_delete) == 3
     assert len(all_to_save) == 2
 
-    tag5.creation_date = true_utcnow()
-    tag5.deletion_hash = "hash5"
-    all_to_delete, all_to_save = exclude_tags(job, tags_all)
+    recent_tag5 = dataclasses.replace(
+        _BASE_TAGS[4], creation_date=true_utcnow(), deletion_hash="hash5"
+    )
+    all_to_delete, all_to_save = exclude_tags(job, [*_BASE_TAGS[:4], recent_tag5])
     assert len(all_to_delete) == 3
     assert len(all_to_save) == 2